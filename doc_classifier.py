@@ -0,0 +1,344 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Clasificación local del tipo de documento antes de llamar al modelo.
+
+Sobre el inicio del texto extraído (aprox. la primera página) se estima cuál
+de los ``required_docs`` del país / tipo de persona es el documento, o si es
+irrelevante. Hay dos clasificadores:
+
+- ``KeywordClassifier``: frases características por tipo de documento
+  (por defecto, no requiere entrenamiento).
+- ``NaiveBayesClassifier``: Naive Bayes multinomial entrenado con las
+  muestras que la app guarda en CLASSIFIER_TRAINING_PATH (campos
+  ``texto_inicio`` y ``doc_type``).
+
+Entrenamiento:
+
+    $ python doc_classifier.py muestras.jsonl modelo.json
+"""
+
+import argparse
+import json
+import math
+import re
+import unicodedata
+
+IRRELEVANT = "Irrelevante"
+
+# Caracteres del inicio del texto que se usan para clasificar (~ primera página).
+CLASSIFIER_CHARS = 3000
+
+# Con menos texto útil no se descarta nada (p. ej. PDFs escaneados sin texto).
+MIN_CLASSIFIABLE_CHARS = 200
+
+# Probabilidad mínima de "irrelevante" para omitir el modelo (Naive Bayes).
+IRRELEVANT_MIN_PROBA = 0.9
+
+# Frases exclusivas distintas (incluido el título) de un tipo no requerido para
+# considerar irrelevante un documento sin coincidencias con los requeridos.
+IRRELEVANT_MIN_PHRASES = 2
+
+# Frases normalizadas (minúsculas, sin tildes) características de cada tipo; la
+# primera es el título del documento.
+DOC_KEYWORDS = {
+    "RUT": ["registro unico tributario", "rol unico tributario", "rut", "dian", "dgi"],
+    "Documento de identidad": ["documento de identidad", "cedula de ciudadania", "registraduria"],
+    "Certificado Bancario": [
+        "certificado bancario",
+        "certificacion bancaria",
+        "cuenta de ahorros",
+        "cuenta corriente",
+        "titular de la cuenta",
+    ],
+    "Camara de Comercio": [
+        "camara de comercio",
+        "certificado de existencia y representacion legal",
+        "matricula mercantil",
+    ],
+    "Constancia de Situacion Fiscal": [
+        "constancia de situacion fiscal",
+        "cedula de identificacion fiscal",
+        "regimen fiscal",
+        "sat",
+    ],
+    "INE": ["instituto nacional electoral", "credencial para votar", "ine"],
+    "Estado de cuenta": ["estado de cuenta", "saldo anterior", "saldo final", "resumen de movimientos"],
+    "Acta constitutiva": ["acta constitutiva", "constitucion de sociedad", "escritura publica"],
+    "Poder legal": ["poder general", "poder especial", "otorga poder", "apoderado"],
+    "CPF": ["cadastro de pessoas fisicas", "cpf", "receita federal"],
+    "RG": ["registro geral", "carteira de identidade", "rg"],
+    "Comprovante de endereço": ["comprovante de endereco", "conta de energia", "endereco"],
+    "Extrato bancario": ["extrato", "saldo anterior", "lancamentos", "conta corrente"],
+    "CNPJ": ["cadastro nacional da pessoa juridica", "comprovante de inscricao", "cnpj"],
+    "Contrato social": ["contrato social", "capital social", "socios", "clausula"],
+    "CUIL": ["codigo unico de identificacion laboral", "cuil", "anses"],
+    "DNI": ["documento nacional de identidad", "dni", "renaper"],
+    "Constancia de CBU": ["constancia de cbu", "clave bancaria uniforme", "cbu"],
+    "CUIT": ["clave unica de identificacion tributaria", "constancia de inscripcion", "cuit", "afip"],
+    "Estatuto / Contrato social": [
+        "estatuto",
+        "contrato social",
+        "capital social",
+        "inspeccion general de justicia",
+    ],
+    "Acta de directorio": ["acta de directorio", "reunion de directorio", "directorio"],
+    "Cedula de identidad": ["cedula de identidad", "registro civil", "documento de identidad"],
+    "Certificado de cuenta bancaria": [
+        "certificado de cuenta",
+        "cuenta corriente",
+        "cuenta vista",
+        "titular de la cuenta",
+    ],
+    "Escritura de constitucion": [
+        "escritura de constitucion",
+        "constitucion de sociedad",
+        "escritura publica",
+    ],
+    "Certificado de vigencia": [
+        "certificado de vigencia",
+        "registro de comercio",
+        "conservador de bienes raices",
+    ],
+    "RUC": ["registro unico de contribuyentes", "ruc", "sunat", "sri"],
+    "Ficha RUC": ["ficha ruc", "informacion del contribuyente", "sunat"],
+    "Vigencia de poder": ["vigencia de poder", "registro de personas juridicas", "sunarp"],
+    "Cedula": ["cedula de ciudadania", "cedula de identidad", "registro civil"],
+    "Certificado bancario": [
+        "certificado bancario",
+        "certificacion bancaria",
+        "cuenta de ahorros",
+        "cuenta corriente",
+        "titular de la cuenta",
+    ],
+    "Nombramiento representante legal": [
+        "nombramiento",
+        "representante legal",
+        "superintendencia de companias",
+    ],
+    "Constancia bancaria": ["constancia bancaria", "cuenta corriente", "caja de ahorro"],
+    "Comprobante de cuenta cliente": ["cuenta cliente", "comprobante de cuenta", "sinpe", "iban"],
+    "Cedula juridica": ["cedula juridica", "registro nacional", "persona juridica"],
+    "Personeria juridica": ["personeria juridica", "certificacion de personeria"],
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# ============================= Funciones auxiliares ========================== #
+
+
+def tokenize(text):
+    """Minúsculas, sin tildes, tokens alfanuméricos."""
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _TOKEN_RE.findall(text)
+
+
+def doc_type_key(name):
+    """Clave de comparación de nombres de tipo de documento (sin tildes ni mayúsculas)."""
+    return " ".join(tokenize(name))
+
+
+def first_page_text(raw_text):
+    """Inicio del texto extraído que se usa para clasificar."""
+    return (raw_text or "")[:CLASSIFIER_CHARS]
+
+
+def _classifiable(tokens):
+    return sum(len(t) for t in tokens) >= MIN_CLASSIFIABLE_CHARS
+
+
+# ============================== Clasificadores =============================== #
+
+
+class KeywordClassifier:
+    """
+    Puntúa cada tipo candidato por las frases características presentes.
+
+    El peso de una frase es su cantidad de palabras dividida por el número de
+    candidatos que la comparten. Sin coincidencias con los candidatos el
+    documento solo se considera irrelevante si hay evidencia positiva de otro
+    tipo conocido: su título y al menos IRRELEVANT_MIN_PHRASES frases de varias
+    palabras exclusivas de ese tipo. Frases genéricas como "persona juridica"
+    o "representante legal", que aparecen en cualquier documento, no bastan.
+    """
+
+    def __init__(self, keywords=None):
+        self.keywords = {
+            doc: [" ".join(tokenize(p)) for p in phrases]
+            for doc, phrases in (keywords or DOC_KEYWORDS).items()
+        }
+        self._distinctive = self._distinctive_phrases()
+
+    def _distinctive_phrases(self):
+        """Por tipo: ``(título, frases de varias palabras que ningún otro tipo usa)``."""
+        owners = {}
+        for doc, phrases in self.keywords.items():
+            for phrase in phrases:
+                owners.setdefault(phrase, set()).add(doc_type_key(doc))
+        return {
+            doc: (
+                phrases[0],
+                {p for p in phrases if " " in p and owners[p] == {doc_type_key(doc)}},
+            )
+            for doc, phrases in self.keywords.items()
+            if phrases
+        }
+
+    def scores(self, text, candidates):
+        padded = " " + " ".join(tokenize(text)) + " "
+        shared = {}
+        for doc in candidates:
+            for phrase in self.keywords.get(doc, []):
+                shared[phrase] = shared.get(phrase, 0) + 1
+        return {
+            doc: sum(
+                len(phrase.split()) / shared[phrase]
+                for phrase in self.keywords.get(doc, [])
+                if f" {phrase} " in padded
+            )
+            for doc in candidates
+        }
+
+    def predict(self, text, candidates):
+        """Retorna ``(tipo, confianza)``; tipo es None si no se puede decidir."""
+        scores = self.scores(text, candidates)
+        best = max(scores, key=scores.get) if scores else None
+        if best is not None and scores[best] > 0:
+            return best, scores[best] / sum(scores.values())
+
+        if not _classifiable(tokenize(text)):
+            return None, 0.0
+        padded = " " + " ".join(tokenize(text)) + " "
+        candidate_keys = {doc_type_key(doc) for doc in candidates}
+        for doc, (title, phrases) in self._distinctive.items():
+            if doc_type_key(doc) in candidate_keys or title not in phrases:
+                continue
+            found = [p for p in phrases if f" {p} " in padded]
+            if title in found and len(found) >= IRRELEVANT_MIN_PHRASES:
+                return IRRELEVANT, 1.0
+        return None, 0.0
+
+
+class NaiveBayesClassifier:
+    """Naive Bayes multinomial sobre tokens, con la clase ``IRRELEVANT``."""
+
+    def __init__(self, class_counts, token_counts):
+        self.class_counts = class_counts
+        self.token_counts = token_counts
+        self.totals = {c: sum(counts.values()) for c, counts in token_counts.items()}
+        self.vocab_size = len({t for counts in token_counts.values() for t in counts})
+
+    @classmethod
+    def fit(cls, samples):
+        """Entrena a partir de pares ``(texto, tipo)``."""
+        class_counts = {}
+        token_counts = {}
+        for text, label in samples:
+            class_counts[label] = class_counts.get(label, 0) + 1
+            counts = token_counts.setdefault(label, {})
+            for token in tokenize(text):
+                counts[token] = counts.get(token, 0) + 1
+        return cls(class_counts, token_counts)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        return cls(data["class_counts"], data["token_counts"])
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(
+                {"class_counts": self.class_counts, "token_counts": self.token_counts},
+                fh,
+                ensure_ascii=False,
+            )
+
+    def proba(self, text, candidates):
+        """Probabilidad de cada candidato conocido (y de IRRELEVANT) dado el texto."""
+        tokens = tokenize(text)
+        labels = [c for c in list(candidates) + [IRRELEVANT] if c in self.class_counts]
+        if not labels:
+            return {}
+        n = sum(self.class_counts[c] for c in labels)
+        log_probs = {}
+        for label in labels:
+            counts, total = self.token_counts[label], self.totals[label]
+            denom = total + self.vocab_size + 1
+            log_probs[label] = math.log(self.class_counts[label] / n) + sum(
+                math.log((counts.get(t, 0) + 1) / denom) for t in tokens
+            )
+        top = max(log_probs.values())
+        exp = {label: math.exp(lp - top) for label, lp in log_probs.items()}
+        norm = sum(exp.values())
+        return {label: value / norm for label, value in exp.items()}
+
+    def predict(self, text, candidates):
+        """Retorna ``(tipo, confianza)``; tipo es None si no se puede decidir."""
+        probs = self.proba(text, candidates)
+        if not probs or not _classifiable(tokenize(text)):
+            return None, 0.0
+        best = max(probs, key=probs.get)
+        if best == IRRELEVANT and probs[best] < IRRELEVANT_MIN_PROBA:
+            del probs[IRRELEVANT]
+            if not probs:
+                return None, 0.0
+            best = max(probs, key=probs.get)
+        return best, probs[best]
+
+
+# =============================== Entrenamiento =============================== #
+
+
+def training_samples(records, rules):
+    """
+    Pares ``(texto, tipo)`` a partir de las muestras almacenadas.
+
+    El tipo detectado por el modelo se compara sin tildes ni mayúsculas. Si
+    coincide con uno de los ``required_docs`` del país / tipo de persona, la
+    etiqueta es ese nombre; si coincide con otro tipo conocido de las reglas,
+    la etiqueta es IRRELEVANT. Cualquier otro registro se descarta, para no
+    enseñar que una variante de nombre de un documento requerido es irrelevante.
+    """
+    known = {
+        doc_type_key(doc)
+        for country in rules.values()
+        for cfg in country["person_types"].values()
+        for doc in cfg["required_docs"]
+    }
+    for record in records:
+        text = record.get("texto_inicio")
+        key = doc_type_key(record.get("doc_type"))
+        if not text or not key:
+            continue
+        try:
+            cfg = rules[record["country"]]["person_types"][record["person_type"]]
+        except KeyError:
+            continue
+        required = {doc_type_key(doc): doc for doc in cfg["required_docs"]}
+        if key in required:
+            yield text, required[key]
+        elif key in known:
+            yield text, IRRELEVANT
+
+
+def main(argv=None):
+    from expiry_forecast import load_results
+    from streamlit_app import COUNTRY_RULES
+
+    parser = argparse.ArgumentParser(
+        description="Entrena el clasificador Naive Bayes con las muestras almacenadas."
+    )
+    parser.add_argument("samples", help="Archivo JSON Lines de CLASSIFIER_TRAINING_PATH.")
+    parser.add_argument("model", help="Archivo JSON de salida para el modelo.")
+    args = parser.parse_args(argv)
+
+    model = NaiveBayesClassifier.fit(training_samples(load_results(args.samples), COUNTRY_RULES))
+    model.save(args.model)
+    for label, count in sorted(model.class_counts.items()):
+        print(f"{label}\t{count}")
+
+
+if __name__ == "__main__":
+    main()
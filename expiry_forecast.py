@@ -0,0 +1,456 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Pronóstico de vencimientos sobre resultados de validación almacenados.
+
+La app guarda (opcionalmente) cada documento validado como una línea JSON en
+un archivo de resultados. Este módulo calcula la fecha de vencimiento efectiva
+de cada documento a partir de ``max_age_days`` y ``fecha_vencimiento`` y
+mantiene un índice ordenado por país para responder "¿qué vence en los
+próximos N días?" sin volver a llamar al modelo.
+
+Uso por línea de comandos:
+
+    $ python expiry_forecast.py resultados.jsonl --days 30 --country Colombia \
+        --index resultados.idx
+
+Con ``--index`` el índice se guarda en disco junto con el byte del archivo de
+resultados hasta el que fue leído; las siguientes ejecuciones solo leen los
+registros nuevos en lugar de reprocesar todo el archivo.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import pickle
+import sys
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, timedelta
+
+# ============================= Funciones auxiliares ========================== #
+
+
+def parse_date(value):
+    """Convierte una fecha ISO (YYYY-MM-DD), date o datetime a date, o None si falla."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.fromisoformat(str(value)).date()
+    except ValueError:
+        return None
+
+
+def compute_expiry_date(fecha_emision, fecha_vencimiento, max_age_days):
+    """
+    Primer día en que el documento ya no es válido.
+
+    Es el más temprano entre ``fecha_emision + max_age_days`` (el mismo día en
+    que la app ya lo marca como ERROR) y el día siguiente a
+    ``fecha_vencimiento`` (válido hasta esa fecha inclusive).
+    Retorna None si no hay información suficiente.
+    """
+    candidates = []
+    emision = parse_date(fecha_emision)
+    if emision and max_age_days:
+        candidates.append(emision + timedelta(days=int(max_age_days)))
+    vencimiento = parse_date(fecha_vencimiento)
+    if vencimiento:
+        candidates.append(vencimiento + timedelta(days=1))
+    return min(candidates) if candidates else None
+
+
+def load_results(path):
+    """Lee un archivo JSON Lines de resultados, ignorando líneas vacías o corruptas."""
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def read_results_from(path, offset=0):
+    """
+    Lee los registros agregados desde el byte ``offset``.
+
+    Solo consume líneas completas (terminadas en salto de línea), para no
+    cortar una escritura en curso. Retorna ``(registros, offset_final)``.
+    """
+    records = []
+    with open(path, "rb") as fh:
+        fh.seek(offset)
+        for line in fh:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+    return records, offset
+
+
+def append_results(path, records):
+    """Agrega registros de validación al archivo JSON Lines de resultados."""
+    with open(path, "a", encoding="utf-8") as fh:
+        for record in records:
+            fh.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+
+# ================================ Índice ===================================== #
+
+# Campos de cada registro que conserva el índice (los que usa el reporte).
+INDEXED_FIELDS = (
+    "person_type",
+    "razon_social",
+    "identificacion",
+    "archivo",
+    "doc_type",
+    "fecha_emision",
+    "fecha_vencimiento",
+)
+
+# Versión del formato del índice guardado con ``--index``.
+INDEX_FORMAT_VERSION = 1
+
+# Bytes del inicio del archivo de resultados con los que se detecta si fue
+# reemplazado desde que se guardó el índice.
+_HEAD_BYTES = 4096
+
+
+def document_key(record):
+    """
+    Identifica un documento a lo largo de sus validaciones.
+
+    Es ``(país, tipo de persona, identificación o razón social, tipo de
+    documento)``, normalizado; None si no hay identificación ni razón social.
+    """
+    holder = record.get("identificacion") or record.get("razon_social")
+    if not holder:
+        return None
+    parts = (
+        record.get("country"),
+        record.get("person_type"),
+        holder,
+        record.get("doc_type"),
+    )
+    return tuple(" ".join(str(p or "").lower().split()) for p in parts)
+
+
+def _is_newer(record, current):
+    # A igual validated_at gana el registro leído después.
+    return (record.get("validated_at") or "") >= (current.get("validated_at") or "")
+
+
+class ExpiryIndex:
+    """
+    Índice de vencimientos ordenado por fecha, separado por país.
+
+    Cada país mantiene dos listas paralelas (ordinal de la fecha de
+    vencimiento y registro), de modo que una consulta por rango es una
+    búsqueda binaria más la copia de los k resultados: O(log n + k).
+
+    De cada documento (ver ``document_key``) solo se conserva la validación
+    más reciente según ``validated_at``: una revalidación o renovación
+    reemplaza a la anterior.
+    """
+
+    def __init__(self):
+        self._keys = {}
+        self._records = {}
+        self._latest = {}
+        self._seq = 0
+        self.skipped = 0
+
+    @classmethod
+    def from_records(cls, records):
+        """Construye el índice en bloque (ordenando una sola vez por país)."""
+        latest = {}
+        unkeyed = []
+        for record in records:
+            key = document_key(record)
+            if key is None:
+                unkeyed.append(record)
+            elif key not in latest or _is_newer(record, latest[key]):
+                latest[key] = record
+
+        index = cls()
+        buckets = {}
+        pending = [(key, record) for key, record in latest.items()]
+        pending.extend((None, record) for record in unkeyed)
+        for key, record in pending:
+            entry = index._make_entry(record)
+            if key is not None:
+                position = entry[:3] if entry else (None, None, None)
+                index._latest[key] = (record.get("validated_at") or "", *position)
+            if entry is None:
+                continue
+            country, ordinal, seq, rec = entry
+            buckets.setdefault(country, []).append((ordinal, seq, rec))
+        for country, entries in buckets.items():
+            entries.sort(key=lambda e: (e[0], e[1]))
+            index._keys[country] = [(ordinal, seq) for ordinal, seq, _ in entries]
+            index._records[country] = [rec for _, _, rec in entries]
+        return index
+
+    def _make_entry(self, record):
+        expiry = compute_expiry_date(
+            record.get("fecha_emision"),
+            record.get("fecha_vencimiento"),
+            record.get("max_age_days"),
+        )
+        if expiry is None:
+            self.skipped += 1
+            return None
+        self._seq += 1
+        country = record.get("country") or "—"
+        rec = {field: record.get(field) for field in INDEXED_FIELDS}
+        rec["fecha_expiracion"] = expiry
+        return country, expiry.toordinal(), self._seq, rec
+
+    def add(self, record):
+        """
+        Inserta un registro manteniendo el orden.
+
+        Si el documento ya estaba indexado, la versión anterior se reemplaza
+        (o se ignora el registro si es más antiguo). Retorna False si el
+        registro no queda en el índice.
+        """
+        key = document_key(record)
+        validated_at = record.get("validated_at") or ""
+        if key is not None and key in self._latest:
+            previous = self._latest[key]
+            if validated_at < previous[0]:
+                return False
+            if previous[1] is not None:
+                self._remove(*previous[1:])
+            del self._latest[key]
+
+        entry = self._make_entry(record)
+        if entry is None:
+            if key is not None:
+                # Sin fecha útil, pero sigue ocultando versiones anteriores.
+                self._latest[key] = (validated_at, None, None, None)
+            return False
+        country, ordinal, seq, rec = entry
+        keys = self._keys.setdefault(country, [])
+        records = self._records.setdefault(country, [])
+        pos = bisect_right(keys, (ordinal, seq))
+        insort(keys, (ordinal, seq))
+        records.insert(pos, rec)
+        if key is not None:
+            self._latest[key] = (validated_at, country, ordinal, seq)
+        return True
+
+    def _remove(self, country, ordinal, seq):
+        keys = self._keys[country]
+        pos = bisect_left(keys, (ordinal, seq))
+        del keys[pos]
+        del self._records[country][pos]
+
+    def __len__(self):
+        return sum(len(keys) for keys in self._keys.values())
+
+    @property
+    def countries(self):
+        return sorted(self._keys)
+
+    def expiring_between(self, start, end, country=None):
+        """Registros cuya fecha de expiración está en [start, end], ordenados por fecha."""
+        lo = (parse_date(start).toordinal(), 0)
+        hi = (parse_date(end).toordinal(), float("inf"))
+        countries = [country] if country else self.countries
+        results = {}
+        for name in countries:
+            keys = self._keys.get(name)
+            if not keys:
+                continue
+            i, j = bisect_left(keys, lo), bisect_right(keys, hi)
+            if i < j:
+                results[name] = self._records[name][i:j]
+        return results
+
+    def expiring_within(self, days, country=None, today=None):
+        """Registros aún válidos hoy que expiran en los próximos ``days`` días, por país."""
+        today = parse_date(today) or date.today()
+        return self.expiring_between(
+            today + timedelta(days=1), today + timedelta(days=days), country
+        )
+
+    def expired(self, country=None, today=None):
+        """Registros que ya no son válidos a la fecha ``today``, agrupados por país."""
+        today = parse_date(today) or date.today()
+        return self.expiring_between(date.min, today, country)
+
+
+# ============================ Índice persistente ============================= #
+
+
+def _file_head(path, length):
+    with open(path, "rb") as fh:
+        return hashlib.sha256(fh.read(min(length, _HEAD_BYTES))).hexdigest()
+
+
+def load_index(results_path, index_path=None):
+    """
+    Índice actualizado para ``results_path``.
+
+    Si ``index_path`` existe y corresponde al mismo archivo de resultados, se
+    carga y solo se leen los registros agregados desde entonces; si no, se
+    construye desde cero. Con ``index_path`` el resultado se guarda de nuevo.
+    """
+    index, offset = None, 0
+    if index_path and os.path.exists(index_path):
+        try:
+            with open(index_path, "rb") as fh:
+                saved = pickle.load(fh)
+            if (
+                saved["version"] == INDEX_FORMAT_VERSION
+                and saved["offset"] <= os.path.getsize(results_path)
+                and saved["head"] == _file_head(results_path, saved["offset"])
+            ):
+                index, offset = saved["index"], saved["offset"]
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError, TypeError):
+            index = None
+
+    records, end = read_results_from(results_path, offset)
+    if index is None:
+        index = ExpiryIndex.from_records(records)
+    else:
+        for record in records:
+            index.add(record)
+
+    if index_path and (end != offset or not os.path.exists(index_path)):
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, "wb") as fh:
+            pickle.dump(
+                {
+                    "version": INDEX_FORMAT_VERSION,
+                    "offset": end,
+                    "head": _file_head(results_path, end),
+                    "index": index,
+                },
+                fh,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp_path, index_path)
+    return index
+
+
+# ================================ Reporte ==================================== #
+
+REPORT_COLUMNS = [
+    "País",
+    "Tipo de persona",
+    "Razón / nombre detectado",
+    "Identificación",
+    "Archivo",
+    "Tipo documento",
+    "Fecha emisión",
+    "Fecha vencimiento",
+    "Válido hasta",
+    "Días restantes",
+]
+
+
+def build_report(index, days, country=None, today=None, include_expired=False):
+    """Genera las filas del reporte de vencimientos (ordenadas por país y fecha)."""
+    today = parse_date(today) or date.today()
+    groups = index.expiring_within(days, country=country, today=today)
+    if include_expired:
+        for name, records in index.expired(country=country, today=today).items():
+            groups[name] = records + groups.get(name, [])
+
+    rows = []
+    for name in sorted(groups):
+        for rec in groups[name]:
+            expiry = rec["fecha_expiracion"]
+            rows.append(
+                {
+                    "País": name,
+                    "Tipo de persona": rec.get("person_type") or "—",
+                    "Razón / nombre detectado": rec.get("razon_social") or "—",
+                    "Identificación": rec.get("identificacion") or "—",
+                    "Archivo": rec.get("archivo") or "—",
+                    "Tipo documento": rec.get("doc_type") or "—",
+                    "Fecha emisión": rec.get("fecha_emision") or "—",
+                    "Fecha vencimiento": rec.get("fecha_vencimiento") or "—",
+                    "Válido hasta": (expiry - timedelta(days=1)).isoformat(),
+                    "Días restantes": (expiry - today).days,
+                }
+            )
+    return rows
+
+
+def write_report(rows, out):
+    """Escribe las filas del reporte como CSV en el stream ``out``."""
+    writer = csv.DictWriter(out, fieldnames=REPORT_COLUMNS)
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def _iso_date(value):
+    parsed = parse_date(value)
+    if parsed is None:
+        raise argparse.ArgumentTypeError(f"fecha inválida {value!r}, se espera YYYY-MM-DD")
+    return parsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Reporte de documentos próximos a vencer a partir de resultados almacenados."
+    )
+    parser.add_argument("results", help="Archivo JSON Lines con resultados de validación.")
+    parser.add_argument("--days", type=int, default=30, help="Horizonte en días (default: 30).")
+    parser.add_argument("--country", help="Filtrar por país.")
+    parser.add_argument(
+        "--today", type=_iso_date, help="Fecha de referencia YYYY-MM-DD (default: hoy)."
+    )
+    parser.add_argument(
+        "--include-expired",
+        action="store_true",
+        help="Incluir también documentos ya vencidos.",
+    )
+    parser.add_argument("--output", help="Archivo CSV de salida (default: stdout).")
+    parser.add_argument(
+        "--index",
+        help="Archivo donde se guarda el índice para actualizarlo de forma incremental.",
+    )
+    args = parser.parse_args(argv)
+
+    index = load_index(args.results, args.index)
+    rows = build_report(
+        index,
+        args.days,
+        country=args.country,
+        today=args.today,
+        include_expired=args.include_expired,
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as fh:
+            write_report(rows, fh)
+    else:
+        write_report(rows, sys.stdout)
+
+    print(
+        f"{len(rows)} documento(s) en el reporte; {len(index)} indexados, "
+        f"{index.skipped} sin fecha interpretable.",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
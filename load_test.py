@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Prueba de carga del flujo de validación con un LLM simulado.
+
+Simula agentes de Service Desk concurrentes que suben mezclas de PDFs y los
+pasan por el mismo flujo que la app (``extract_text_from_pdf`` +
+``validate_document``), pero contra un cliente local que imita
+``client.responses.create`` con latencia configurable e inyección de 429.
+
+Cada worker es un proceso (equivalente a una réplica de la app) que ejecuta
+``--agents`` hilos, igual que Streamlit atiende cada sesión en un hilo. El
+límite ``--rate-limit`` es compartido por todos los workers, como el límite
+real de OpenAI para una misma API key.
+
+    $ python load_test.py muestras/ --workers 2 --agents 8 --uploads 5 \\
+        --latency 1.5 --error-rate 0.05
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import random
+import resource
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+# =============================== LLM simulado ================================ #
+
+
+class TokenBucket:
+    """
+    Token bucket de ``rate`` llamadas/s compartido entre procesos.
+
+    La capacidad es ``max(1, rate)``: con menos de una llamada/s se acumula un
+    token cada ``1/rate`` segundos. El estado vive en un ``multiprocessing.Manager``, así que la misma
+    instancia puede pasarse a todos los workers.
+    """
+
+    def __init__(self, manager, rate):
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self._lock = manager.Lock()
+        self._state = manager.Namespace(tokens=self.capacity, last=time.monotonic())
+
+    def acquire(self):
+        """Consume un token; retorna False si no hay disponibles."""
+        with self._lock:
+            now = time.monotonic()
+            tokens = min(self.capacity, self._state.tokens + (now - self._state.last) * self.rate)
+            self._state.last = now
+            allowed = tokens >= 1
+            self._state.tokens = tokens - 1 if allowed else tokens
+            return allowed
+
+
+class StubLLMClient:
+    """
+    Cliente que imita ``client.responses.create`` de OpenAI.
+
+    Cada llamada espera ``latency`` segundos (± ``jitter`` relativo) y responde
+    un JSON plausible para el país/tipo de persona. Lanza ``RateLimitError``
+    con probabilidad ``error_rate`` o cuando ``bucket`` (TokenBucket, None =
+    sin límite) no tiene tokens. Los valores aleatorios salen de
+    ``context.rng`` (un ``random.Random`` por hilo/agente), así ``--seed``
+    reproduce la corrida.
+    """
+
+    def __init__(self, rules, latency=1.0, jitter=0.3, error_rate=0.0, bucket=None):
+        self.rules = rules
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.bucket = bucket
+        self.responses = SimpleNamespace(create=self._create)
+        self.context = threading.local()
+
+    def _create(self, model, input, **kwargs):
+        import httpx
+        from openai import RateLimitError
+
+        rng = self.context.rng
+        limited = self.bucket is not None and not self.bucket.acquire()
+        if limited or rng.random() < self.error_rate:
+            response = httpx.Response(
+                429, request=httpx.Request("POST", "http://stub-llm/v1/responses")
+            )
+            raise RateLimitError("Rate limit reached (stub)", response=response, body=None)
+
+        time.sleep(max(0.0, rng.uniform(1 - self.jitter, 1 + self.jitter) * self.latency))
+
+        country, person_type = self.context.country, self.context.person_type
+        cfg = self.rules[country]["person_types"][person_type]
+        doc_type = rng.choice(cfg["required_docs"])
+        max_age = cfg["max_age_days"].get(doc_type, 365)
+        issued = date.today() - timedelta(days=rng.randint(0, int(max_age * 1.2)))
+        payload = {
+            "tipo_documento": doc_type,
+            "razon_social": "ACME S.A.S.",
+            "identificacion": "900123456",
+            "fecha_emision": issued.isoformat(),
+            "fecha_vencimiento": None,
+        }
+        text = json.dumps(payload)
+        return SimpleNamespace(output=[SimpleNamespace(content=[SimpleNamespace(text=text)])])
+
+
+# ================================= Worker ==================================== #
+
+
+def _run_agent(client, pdfs, args, seed):
+    from openai import OpenAIError
+
+    from streamlit_app import COUNTRY_RULES, extract_text_from_pdf, validate_document
+
+    rng = random.Random(seed)
+    client.context.rng = random.Random(rng.getrandbits(64))
+    samples = []
+    for _ in range(args.uploads):
+        country = args.country or rng.choice(list(COUNTRY_RULES))
+        person_type = rng.choice(list(COUNTRY_RULES[country]["person_types"]))
+        client.context.country = country
+        client.context.person_type = person_type
+
+        upload = rng.sample(pdfs, min(args.docs_per_upload, len(pdfs)))
+        for name, data in upload:
+            t0 = time.perf_counter()
+            raw_text = extract_text_from_pdf(io.BytesIO(data))
+            t1 = time.perf_counter()
+            try:
+                _, record = validate_document(
+                    client, name, raw_text, country, person_type, "ACME", "900123456"
+                )
+                # Sin registro: el clasificador local lo descartó sin llamar al LLM.
+                status = "ok" if record is not None else "skipped"
+            except OpenAIError as e:
+                status = "429" if getattr(e, "status_code", None) == 429 else "error"
+            t2 = time.perf_counter()
+            samples.append(
+                {"extract": t1 - t0, "llm": t2 - t1, "total": t2 - t0, "status": status}
+            )
+    return samples
+
+
+def run_worker(worker_id, pdf_paths, args, bucket=None):
+    """Ejecuta ``args.agents`` agentes en hilos y retorna métricas del proceso."""
+    from streamlit_app import COUNTRY_RULES
+
+    pdfs = [(Path(p).name, Path(p).read_bytes()) for p in pdf_paths]
+    client = StubLLMClient(
+        COUNTRY_RULES,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        bucket=bucket,
+    )
+
+    usage0 = resource.getrusage(resource.RUSAGE_SELF)
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.agents) as pool:
+        futures = [
+            pool.submit(_run_agent, client, pdfs, args, args.seed + worker_id * 1000 + i)
+            for i in range(args.agents)
+        ]
+        samples = [s for f in futures for s in f.result()]
+    elapsed = time.perf_counter() - t0
+    usage1 = resource.getrusage(resource.RUSAGE_SELF)
+
+    return {
+        "worker": worker_id,
+        "elapsed": elapsed,
+        "cpu": (usage1.ru_utime + usage1.ru_stime) - (usage0.ru_utime + usage0.ru_stime),
+        "max_rss_mb": usage1.ru_maxrss / 1024,  # KB en Linux
+        "samples": samples,
+    }
+
+
+# ================================ Reporte ==================================== #
+
+
+def percentile(values, pct):
+    """Percentil por rango más cercano; None si no hay valores."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(samples, elapsed):
+    totals = [s["total"] for s in samples if s["status"] == "ok"]
+    return {
+        "docs": len(samples),
+        "ok": len(totals),
+        "skipped": sum(s["status"] == "skipped" for s in samples),
+        "429": sum(s["status"] == "429" for s in samples),
+        "errors": sum(s["status"] == "error" for s in samples),
+        "throughput": len(totals) / elapsed if elapsed else 0.0,
+        "p50": percentile(totals, 50),
+        "p95": percentile(totals, 95),
+        "p99": percentile(totals, 99),
+        "extract_p95": percentile([s["extract"] for s in samples], 95),
+        "llm_p95": percentile([s["llm"] for s in samples if s["status"] == "ok"], 95),
+    }
+
+
+def _fmt(value, spec=".2f"):
+    return "—" if value is None else format(value, spec)
+
+
+def print_report(workers, elapsed):
+    header = (
+        "Worker\tDocs\tOK\tOmitidos\t429\tErrores\tDocs/s\tp50 s\tp95 s\tp99 s"
+        "\tExtract p95 s\tLLM p95 s\tCPU s\tRSS máx MB"
+    )
+    print(header)
+    for w in workers:
+        s = summarize(w["samples"], w["elapsed"])
+        print(
+            f"{w['worker']}\t{s['docs']}\t{s['ok']}\t{s['skipped']}\t{s['429']}\t{s['errors']}"
+            f"\t{_fmt(s['throughput'])}\t{_fmt(s['p50'])}\t{_fmt(s['p95'])}\t{_fmt(s['p99'])}"
+            f"\t{_fmt(s['extract_p95'])}\t{_fmt(s['llm_p95'])}"
+            f"\t{_fmt(w['cpu'], '.1f')}\t{_fmt(w['max_rss_mb'], '.0f')}"
+        )
+
+    s = summarize([x for w in workers for x in w["samples"]], elapsed)
+    print(
+        f"\nTotal: {s['ok']}/{s['docs']} docs OK en {elapsed:.1f} s "
+        f"({s['throughput']:.2f} docs/s), {s['skipped']} omitidos por el clasificador, "
+        f"{s['429']} respuestas 429, {s['errors']} errores; "
+        f"latencia p50/p95/p99 = {_fmt(s['p50'])}/{_fmt(s['p95'])}/{_fmt(s['p99'])} s"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Prueba de carga del flujo de validación contra un LLM simulado."
+    )
+    parser.add_argument("pdfs", help="Carpeta con PDFs de muestra (se busca recursivamente).")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos / réplicas (default: 1).")
+    parser.add_argument("--agents", type=int, default=4, help="Sesiones concurrentes por worker.")
+    parser.add_argument("--uploads", type=int, default=3, help="Validaciones por agente.")
+    parser.add_argument("--docs-per-upload", type=int, default=3, help="PDFs por validación.")
+    parser.add_argument("--country", help="Fijar país (default: aleatorio por validación).")
+    parser.add_argument("--latency", type=float, default=1.0, help="Latencia media del LLM (s).")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Variación relativa de latencia.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probabilidad de 429.")
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=0.0,
+        help="Llamadas/s entre todos los workers antes de 429 (0 = sin límite).",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Guardar las muestras crudas en este archivo JSON.")
+    args = parser.parse_args(argv)
+
+    pdf_paths = sorted(str(p) for p in Path(args.pdfs).rglob("*.pdf"))
+    if not pdf_paths:
+        parser.error(f"No se encontraron PDFs en {args.pdfs}")
+
+    with multiprocessing.Manager() as manager:
+        bucket = TokenBucket(manager, args.rate_limit) if args.rate_limit else None
+        t0 = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [
+                pool.submit(run_worker, i, pdf_paths, args, bucket) for i in range(args.workers)
+            ]
+            workers = [f.result() for f in futures]
+        elapsed = time.perf_counter() - t0
+
+    print_report(workers, elapsed)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(workers, fh)
+
+
+if __name__ == "__main__":
+    main()
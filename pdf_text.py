@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Extracción de texto de PDFs consciente de tablas.
+
+Certificados bancarios y estados de cuenta son mayormente tablas, y
+``page.extract_text()`` las aplana en texto intercalado. Aquí las regiones
+tabulares se emiten como ``clave: valor`` (tablas de dos columnas) o TSV en su
+posición dentro de la página, las filas de movimientos se resumen en una sola
+línea y se eliminan los encabezados/pies de página idénticos repetidos entre
+páginas.
+
+Para medir la reducción del texto enviado al modelo:
+
+    $ python pdf_text.py muestras/*/*.pdf
+
+agrupa los resultados por el nombre de la carpeta (tipo de documento).
+"""
+
+import argparse
+import os
+import re
+
+# Mínimo de filas con fecha y monto para considerar una tabla de movimientos.
+TRANSACTION_MIN_ROWS = 3
+
+# Líneas al inicio y al final de cada página donde se buscan encabezados/pies.
+HEADER_FOOTER_LINES = 3
+
+# Fechas completas (día, mes y año) o con nombre de mes; "12.50" no es fecha.
+_DATE_RE = re.compile(
+    r"\b\d{4}-\d{2}-\d{2}\b"
+    r"|\b\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}\b"
+    r"|\b\d{1,2}\s*(?:de\s+)?(?:ene(?:ro)?|feb(?:rero)?|mar(?:zo)?|abr(?:il)?|may(?:o)?"
+    r"|jun(?:io)?|jul(?:io)?|ago(?:sto)?|sep(?:tiembre)?|set(?:iembre)?|oct(?:ubre)?"
+    r"|nov(?:iembre)?|dic(?:iembre)?)\b",
+    re.IGNORECASE,
+)
+_AMOUNT_RE = re.compile(r"[-+]?\$?\s?\d{1,3}(?:[.,]\d{3})*[.,]\d{2}\b")
+_PAGE_NUMBER_RE = re.compile(
+    r"^(?:p[aá]g(?:ina)?\.?|page)?\s*\d+\s*(?:de|of|/)\s*\d+$", re.IGNORECASE
+)
+
+# ============================= Funciones auxiliares ========================== #
+
+
+def _clean_cell(cell):
+    return " ".join((cell or "").split())
+
+
+def _is_transaction_row(cells):
+    has_date = any(_DATE_RE.search(c) for c in cells)
+    has_amount = any(_AMOUNT_RE.search(c) for c in cells)
+    return has_date and has_amount
+
+
+def _first_date(cells):
+    for cell in cells:
+        match = _DATE_RE.search(cell)
+        if match:
+            return match.group(0)
+    return None
+
+
+def format_table(rows):
+    """
+    Convierte las filas de una tabla en texto compacto.
+
+    Las tablas de dos columnas se emiten como ``clave: valor``; el resto como
+    TSV. En tablas de más de dos columnas, si hay varias filas de movimientos
+    (fecha + monto) se reemplazan por una línea con la cantidad y el rango de
+    fechas.
+    """
+    rows = [[_clean_cell(c) for c in row] for row in rows]
+    rows = [row for row in rows if any(row)]
+    if not rows:
+        return ""
+
+    wide = max(sum(1 for c in row if c) for row in rows) > 2
+    transactions = [row for row in rows if _is_transaction_row(row)] if wide else []
+    if len(transactions) >= TRANSACTION_MIN_ROWS:
+        kept = [row for row in rows if not _is_transaction_row(row)]
+        first, last = _first_date(transactions[0]), _first_date(transactions[-1])
+        summary = f"[{len(transactions)} movimientos omitidos: {first} – {last}]"
+    else:
+        kept, summary = rows, None
+
+    lines = []
+    for row in kept:
+        cells = [c for c in row if c]
+        if len(cells) == 2:
+            lines.append(f"{cells[0]}: {cells[1]}")
+        else:
+            lines.append("\t".join(cells))
+    if summary:
+        lines.append(summary)
+    return "\n".join(lines)
+
+
+def _outside_bboxes(bboxes):
+    def keep(obj):
+        cx = (obj["x0"] + obj["x1"]) / 2
+        cy = (obj["top"] + obj["bottom"]) / 2
+        return not any(x0 <= cx <= x1 and top <= cy <= bottom for x0, top, x1, bottom in bboxes)
+
+    return keep
+
+
+def _edge_positions(lines):
+    n = len(lines)
+    return set(range(min(HEADER_FOOTER_LINES, n))) | set(range(max(0, n - HEADER_FOOTER_LINES), n))
+
+
+def _drop_repeated_lines(pages_lines):
+    """
+    Quita encabezados y pies de página repetidos.
+
+    Solo se consideran las primeras/últimas HEADER_FOOTER_LINES líneas de cada
+    página. Una línea idéntica que ya apareció en esa zona de otra página se
+    omite, y los números de página ("Página 2 de 3") se omiten siempre.
+    """
+    masks = _repeated_line_masks(pages_lines)
+    return [
+        [line for line, drop in zip(lines, mask) if not drop]
+        for lines, mask in zip(pages_lines, masks)
+    ]
+
+
+def _repeated_line_masks(pages_lines):
+    """Por página, True en cada línea que _drop_repeated_lines omite."""
+    if len(pages_lines) < 2:
+        return [[False] * len(lines) for lines in pages_lines]
+
+    pages_per_line = {}
+    for lines in pages_lines:
+        for line in {lines[i] for i in _edge_positions(lines)}:
+            pages_per_line[line] = pages_per_line.get(line, 0) + 1
+
+    seen = set()
+    masks = []
+    for lines in pages_lines:
+        edges = _edge_positions(lines)
+        mask = []
+        for i, line in enumerate(lines):
+            drop = False
+            if i in edges:
+                if _PAGE_NUMBER_RE.match(line):
+                    drop = True
+                elif pages_per_line[line] > 1:
+                    drop = line in seen
+                    seen.add(line)
+            mask.append(drop)
+        masks.append(mask)
+    return masks
+
+
+def _merge_by_position(lines, tables):
+    """
+    Intercala líneas de texto y tablas según su coordenada ``top``.
+
+    Ambos son listas de ``(top, texto)``; a igual altura la línea va primero.
+    """
+    items = [(top, 0, text) for top, text in lines]
+    items.extend((top, 1, text) for top, text in tables if text)
+    items.sort(key=lambda item: (item[0], item[1]))
+    return [text for _, _, text in items]
+
+
+# =============================== Extracción ================================== #
+
+
+def extract_plain_text(file):
+    """Extrae texto concatenando ``page.extract_text()`` de todas las páginas."""
+    import pdfplumber
+
+    text_parts = []
+    with pdfplumber.open(file) as pdf:
+        for page in pdf.pages:
+            page_text = page.extract_text() or ""
+            text_parts.append(page_text)
+    return "\n".join(text_parts)
+
+
+def extract_compact_text(file):
+    """Extrae texto de un PDF tratando las tablas por separado (ver módulo)."""
+    import pdfplumber
+
+    pages_lines = []
+    pages_tables = []
+    with pdfplumber.open(file) as pdf:
+        for page in pdf.pages:
+            tables = page.find_tables()
+            bboxes = [table.bbox for table in tables]
+            body = page.filter(_outside_bboxes(bboxes)) if bboxes else page
+            pages_lines.append(
+                [
+                    (line["top"], line["text"].strip())
+                    for line in body.extract_text_lines()
+                    if line["text"].strip()
+                ]
+            )
+            pages_tables.append(
+                [(table.bbox[1], format_table(table.extract())) for table in tables]
+            )
+
+    masks = _repeated_line_masks([[text for _, text in lines] for lines in pages_lines])
+    parts = []
+    for lines, mask, tables in zip(pages_lines, masks, pages_tables):
+        kept = [line for line, drop in zip(lines, mask) if not drop]
+        parts.extend(_merge_by_position(kept, tables))
+    return "\n".join(parts)
+
+
+# ================================ Reporte ==================================== #
+
+
+def _reduction(plain, compact):
+    return f"{(1 - compact / plain) * 100:.1f}%" if plain else "—"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compara el tamaño del texto plano vs. el texto compacto por tipo de documento."
+    )
+    parser.add_argument("pdfs", nargs="+", help="PDFs a medir; la carpeta padre se usa como tipo.")
+    args = parser.parse_args(argv)
+
+    totals = {}
+    for path in args.pdfs:
+        doc_type = os.path.basename(os.path.dirname(os.path.abspath(path)))
+        plain = len(extract_plain_text(path))
+        compact = len(extract_compact_text(path))
+        print(f"{path}\t{plain}\t{compact}\t{_reduction(plain, compact)}")
+        total = totals.setdefault(doc_type, [0, 0, 0])
+        total[0] += 1
+        total[1] += plain
+        total[2] += compact
+
+    print("\nTipo documento\tArchivos\tChars plano\tChars compacto\tReducción")
+    for doc_type, (count, plain, compact) in sorted(totals.items()):
+        print(f"{doc_type}\t{count}\t{plain}\t{compact}\t{_reduction(plain, compact)}")
+
+
+if __name__ == "__main__":
+    main()
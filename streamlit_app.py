@@ -1,13 +1,57 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import time
+
+_MODULE_T0 = time.perf_counter()
+
 import json
+import logging
+import os
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 
-import pdfplumber
-import pandas as pd
 import streamlit as st
-from openai import OpenAI, OpenAIError
+
+from doc_classifier import (
+    IRRELEVANT,
+    KeywordClassifier,
+    NaiveBayesClassifier,
+    first_page_text,
+)
+from expiry_forecast import append_results
+from pdf_text import extract_compact_text
+
+# pdfplumber, pandas y openai se importan de forma diferida dentro de las
+# funciones que los usan: cada rerun de Streamlit re-ejecuta este módulo y
+# solo la validación los necesita.
+
+logger = logging.getLogger(__name__)
+if not logger.handlers:
+    # Streamlit solo configura sus propios loggers; sin esto los INFO se pierden.
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+# Si está definida, se muestran los tiempos de import y de rerun en la página.
+SHOW_PERF_METRICS = bool(os.environ.get("SHOW_PERF_METRICS"))
+
+# Textos de PDF extraídos que se conservan por sesión para reruns.
+PDF_TEXT_CACHE_MAX_ENTRIES = 20
+
+# Ruta opcional (JSON Lines) donde se guardan los resultados de cada validación
+# para alimentar el pronóstico de vencimientos (ver expiry_forecast.py).
+RESULTS_STORE_PATH = os.environ.get("RESULTS_STORE_PATH")
+
+# Ruta opcional (JSON Lines) donde se guarda el inicio del texto de cada
+# documento para entrenar el clasificador local. Contiene datos personales
+# (nombres, identificaciones, cuentas), por eso va aparte y es opt-in.
+CLASSIFIER_TRAINING_PATH = os.environ.get("CLASSIFIER_TRAINING_PATH")
+
+# Modelo opcional del clasificador local entrenado con esas muestras
+# (ver doc_classifier.py). Sin él se usa el clasificador por palabras clave.
+CLASSIFIER_MODEL_PATH = os.environ.get("CLASSIFIER_MODEL_PATH")
 
 # ====================== Configuración de reglas por país ===================== #
 # NOTA: Estas reglas son un ejemplo. Ajusta required_docs y max_age_days
@@ -398,32 +442,81 @@ section[data-testid="stSidebar"] {
 
 
 def get_client(api_key):
-    """Devuelve un cliente de OpenAI con la API key proporcionada."""
-    return OpenAI(api_key=api_key)
+    """
+    Devuelve un cliente de OpenAI con la API key proporcionada.
+
+    Se guarda en ``st.session_state`` (no en un caché global del proceso) para
+    que la key solo viva en la sesión actual; se recrea si la key cambia.
+    """
+    cached = st.session_state.get("openai_client")
+    if cached and cached[0] == api_key:
+        return cached[1]
+
+    from openai import OpenAI
+
+    client = OpenAI(api_key=api_key)
+    st.session_state["openai_client"] = (api_key, client)
+    return client
+
+
+@st.cache_resource(show_spinner=False)
+def get_classifier():
+    """Clasificador local de tipo de documento (cacheado entre sesiones)."""
+    if CLASSIFIER_MODEL_PATH:
+        try:
+            return NaiveBayesClassifier.load(CLASSIFIER_MODEL_PATH)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(
+                "No se pudo cargar el modelo %s (%s); se usan palabras clave.",
+                CLASSIFIER_MODEL_PATH,
+                e,
+            )
+    return KeywordClassifier()
+
+
+def extract_text_from_pdf_bytes(data):
+    """
+    Versión cacheada por contenido de extract_text_from_pdf.
+
+    El caché es por sesión (``st.session_state``) y guarda como máximo
+    PDF_TEXT_CACHE_MAX_ENTRIES documentos.
+    """
+    import hashlib
+    import io
+
+    cache = st.session_state.setdefault("pdf_text_cache", {})
+    key = hashlib.sha256(data).hexdigest()
+    if key not in cache:
+        if len(cache) >= PDF_TEXT_CACHE_MAX_ENTRIES:
+            cache.pop(next(iter(cache)))
+        cache[key] = extract_text_from_pdf(io.BytesIO(data))
+    return cache[key]
 
 
 def extract_text_from_pdf(file):
-    """Extrae texto concatenando todas las páginas de un PDF."""
-    text_parts = []
-    with pdfplumber.open(file) as pdf:
-        for page in pdf.pages:
-            page_text = page.extract_text() or ""
-            text_parts.append(page_text)
-    return "\n".join(text_parts)
+    """Extrae el texto de un PDF con tablas compactadas (ver pdf_text.py)."""
+    return extract_compact_text(file)
 
 
-def call_llm_extract_info(client, raw_text, country, person_type):
+def call_llm_extract_info(client, raw_text, country, person_type, predicted_type=None):
     """
     Usa el modelo para detectar tipo de documento, razón social, identificación y fechas.
+    ``predicted_type`` es el tipo estimado por el clasificador local, si lo hay.
     Retorna un dict con claves estándar.
     """
+    hint = (
+        f"- Tipo de documento probable (clasificador local): {predicted_type}. "
+        "Confírmalo o corrígelo.\n"
+        if predicted_type
+        else ""
+    )
     prompt = f"""
 Eres un asistente experto en lectura de documentos legales y fiscales de LATAM.
 
 Contexto:
 - País: {country}
 - Tipo de contribuyente: {person_type}
-
+{hint}
 Del siguiente texto de un PDF, extrae (si existen) los campos:
 - tipo_documento: (ejemplos según el país/contexto: "RUT", "Camara de Comercio",
   "Certificado Bancario", "Constancia de Situacion Fiscal", "INE", "CPF", "CNPJ",
@@ -472,9 +565,149 @@ def parse_date_safe(date_str):
         return None
 
 
+def validate_document(
+    client, file_name, raw_text, country, person_type, expected_legal_name="", expected_id=""
+):
+    """
+    Extrae los datos del documento con el modelo y aplica las validaciones.
+
+    Retorna ``(fila, registro)``: la fila para la tabla de resultados y el
+    registro que se guarda en RESULTS_STORE_PATH. Si el clasificador local
+    descarta el documento como irrelevante no se llama al modelo y el
+    registro es None. Los errores de OpenAI se propagan al llamador.
+    """
+    rules_cfg = COUNTRY_RULES[country]["person_types"][person_type]
+    id_label = rules_cfg["id_label"]
+
+    predicted_type, _ = get_classifier().predict(
+        first_page_text(raw_text), rules_cfg["required_docs"]
+    )
+    if predicted_type == IRRELEVANT:
+        row = {
+            "Archivo": file_name,
+            "Tipo documento": IRRELEVANT,
+            "Razón / nombre detectado": "—",
+            f"{id_label} detectado": "—",
+            "Fecha emisión": "—",
+            "Fecha vencimiento": "—",
+            "Estado": "WARNING",
+            "Detalle": (
+                f"No parece ser un documento requerido para {person_type} en {country}; "
+                "se omitió la lectura con el modelo."
+            ),
+        }
+        return row, None
+
+    info = call_llm_extract_info(client, raw_text, country, person_type, predicted_type)
+
+    doc_type = (info.get("tipo_documento") or "Desconocido").strip()
+    razon = (info.get("razon_social") or "").strip()
+    identificacion = (info.get("identificacion") or "").strip()
+    fecha_emision_str = info.get("fecha_emision")
+    fecha_vencimiento_str = info.get("fecha_vencimiento")
+
+    estado = "OK"
+    detalle_msgs = []
+
+    # Comparar razón social / nombre
+    if expected_legal_name:
+        if not razon:
+            estado = "WARNING"
+            detalle_msgs.append(
+                "No se detectó razón social / nombre, revisar manualmente."
+            )
+        elif expected_legal_name.lower() not in razon.lower():
+            estado = "WARNING"
+            detalle_msgs.append(
+                "La razón social / nombre no coincide con la esperada."
+            )
+
+    # Comparar identificación
+    if expected_id:
+        if not identificacion:
+            estado = "WARNING"
+            detalle_msgs.append(
+                "No se detectó identificación fiscal, revisar manualmente."
+            )
+        elif expected_id not in identificacion:
+            estado = "WARNING"
+            detalle_msgs.append(
+                f"El {id_label} no coincide con el esperado."
+            )
+
+    # Vigencia
+    max_age_days = rules_cfg["max_age_days"].get(doc_type)
+    fecha_emision = parse_date_safe(fecha_emision_str)
+    if max_age_days and fecha_emision:
+        delta = datetime.now() - fecha_emision
+        if delta > timedelta(days=max_age_days):
+            estado = "ERROR"
+            detalle_msgs.append(
+                f"Documento con vigencia mayor a {max_age_days} días."
+            )
+    elif max_age_days and not fecha_emision:
+        estado = "WARNING"
+        detalle_msgs.append(
+            "No se pudo interpretar la fecha de emisión para validar vigencia."
+        )
+
+    row = {
+        "Archivo": file_name,
+        "Tipo documento": doc_type,
+        "Razón / nombre detectado": razon or "—",
+        f"{id_label} detectado": identificacion or "—",
+        "Fecha emisión": fecha_emision_str or "—",
+        "Fecha vencimiento": fecha_vencimiento_str or "—",
+        "Estado": estado,
+        "Detalle": " | ".join(detalle_msgs) if detalle_msgs else "OK",
+    }
+    record = {
+        "validated_at": datetime.now().isoformat(timespec="seconds"),
+        "country": country,
+        "person_type": person_type,
+        "archivo": file_name,
+        "doc_type": doc_type,
+        "razon_social": razon or None,
+        "identificacion": identificacion or None,
+        "fecha_emision": fecha_emision_str,
+        "fecha_vencimiento": fecha_vencimiento_str,
+        "max_age_days": max_age_days,
+        "estado": estado,
+        "tipo_predicho": predicted_type,
+    }
+    return row, record
+
+
+def log_timing(label, seconds):
+    """Registra un tiempo medido y, si SHOW_PERF_METRICS está activo, lo muestra."""
+    logger.info("%s: %.1f ms", label, seconds * 1000)
+    if SHOW_PERF_METRICS:
+        st.caption(f"⏱️ {label}: {seconds * 1000:.1f} ms")
+
+
+@contextmanager
+def timed(label):
+    """Mide el bloque y lo registra con log_timing (también si hay un return)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        log_timing(label, time.perf_counter() - t0)
+
+
 # ================================ App ======================================= #
 
+IMPORT_SECONDS = time.perf_counter() - _MODULE_T0
+
+
 def main():
+    t0 = time.perf_counter()
+    render()
+    log_timing("Import del módulo", IMPORT_SECONDS)
+    log_timing("Rerun", time.perf_counter() - t0)
+
+
+def render():
     st.set_page_config(
         page_title="Validador de documentación Rappi",
         layout="wide",
@@ -510,9 +743,10 @@ def main():
         )
 
         st.write("")
-        col_left, col_right = st.columns([1.1, 1])
+        col_left, _ = st.columns([1.1, 1])
 
-        # --------- Panel izquierdo: parámetros --------- #
+        # País y tipo de persona quedan fuera del formulario porque definen
+        # la etiqueta del campo de identificación.
         with col_left:
             st.markdown('<div class="card">', unsafe_allow_html=True)
             st.subheader("1. Parámetros de validación")
@@ -525,9 +759,16 @@ def main():
                 horizontal=True,
             )
 
-            cfg = COUNTRY_RULES[country]["person_types"][person_type]
-            id_label = cfg["id_label"]
+        cfg = COUNTRY_RULES[country]["person_types"][person_type]
+        id_label = cfg["id_label"]
+
+        # El resto de campos van en un formulario: escribir en ellos no
+        # dispara reruns hasta que se envía la validación.
+        form = st.form("validation_form")
+        form_left, form_right = form.columns([1.1, 1])
 
+        # --------- Panel izquierdo: parámetros --------- #
+        with form_left:
             expected_legal_name = st.text_input(
                 "Razón social / nombre esperado",
                 help="Nombre tal como debería aparecer en la documentación.",
@@ -558,7 +799,7 @@ def main():
             st.markdown("</div>", unsafe_allow_html=True)
 
         # --------- Panel derecho: carga de documentos --------- #
-        with col_right:
+        with form_right:
             st.markdown('<div class="card">', unsafe_allow_html=True)
             st.subheader("2. Carga de documentos")
 
@@ -581,185 +822,172 @@ def main():
 
             st.markdown("</div>", unsafe_allow_html=True)
 
+        submitted = form.form_submit_button("🔍 Ejecutar validación")
+
         st.write("")
 
         # --------- Resultado --------- #
         st.markdown('<div class="card">', unsafe_allow_html=True)
         st.subheader("3. Resultado de la validación")
 
-        if st.button("🔍 Ejecutar validación"):
+        if submitted:
             if not api_key:
                 st.error("Debes ingresar tu OpenAI API Key.")
             elif not uploaded_files:
                 st.error("Debes subir al menos un documento PDF.")
             else:
-                try:
-                    client = get_client(api_key)
-                except Exception as e:
-                    st.error(f"No se pudo inicializar el cliente de OpenAI: {e}")
-                    st.markdown("</div></div>", unsafe_allow_html=True)
-                    return
-
-                rules_cfg = COUNTRY_RULES[country]["person_types"][person_type]
-                results = []
-                detected_doc_types = set()
-
-                progress_bar = st.progress(0.0)
-                total_files = len(uploaded_files)
-
-                for idx, file in enumerate(uploaded_files, start=1):
-                    progress_bar.progress(idx / total_files)
-                    st.write(f"Procesando: **{file.name}** ...")
-
-                    raw_text = extract_text_from_pdf(file)
+                with timed("Validación (incluye imports diferidos)"):
+                    with timed("Imports diferidos (pdfplumber, pandas, openai)"):
+                        # pdfplumber se usa en pdf_text; se importa aquí para medir
+                        # su costo en la primera validación del proceso.
+                        import pandas as pd
+                        import pdfplumber  # noqa: F401
+                        from openai import OpenAIError
 
                     try:
-                        info = call_llm_extract_info(
-                            client, raw_text, country, person_type
-                        )
-                    except OpenAIError as e:
-                        st.error(f"Error al llamar a OpenAI para {file.name}: {e}")
-                        continue
-
-                    doc_type = (info.get("tipo_documento") or "Desconocido").strip()
-                    razon = (info.get("razon_social") or "").strip()
-                    identificacion = (info.get("identificacion") or "").strip()
-                    fecha_emision_str = info.get("fecha_emision")
-                    fecha_vencimiento_str = info.get("fecha_vencimiento")
-
-                    detected_doc_types.add(doc_type)
-
-                    estado = "OK"
-                    detalle_msgs = []
-
-                    # Comparar razón social / nombre
-                    if expected_legal_name:
-                        if not razon:
-                            estado = "WARNING"
-                            detalle_msgs.append(
-                                "No se detectó razón social / nombre, revisar manualmente."
+                        client = get_client(api_key)
+                    except Exception as e:
+                        st.error(f"No se pudo inicializar el cliente de OpenAI: {e}")
+                        st.markdown("</div></div>", unsafe_allow_html=True)
+                        return
+
+                    rules_cfg = COUNTRY_RULES[country]["person_types"][person_type]
+                    results = []
+                    stored_records = []
+                    training_samples = []
+                    detected_doc_types = set()
+
+                    progress_bar = st.progress(0.0)
+                    total_files = len(uploaded_files)
+
+                    for idx, file in enumerate(uploaded_files, start=1):
+                        progress_bar.progress(idx / total_files)
+                        st.write(f"Procesando: **{file.name}** ...")
+
+                        raw_text = extract_text_from_pdf_bytes(file.getvalue())
+
+                        try:
+                            row, record = validate_document(
+                                client,
+                                file.name,
+                                raw_text,
+                                country,
+                                person_type,
+                                expected_legal_name,
+                                expected_id,
                             )
-                        elif expected_legal_name.lower() not in razon.lower():
-                            estado = "WARNING"
-                            detalle_msgs.append(
-                                "La razón social / nombre no coincide con la esperada."
+                        except OpenAIError as e:
+                            st.error(f"Error al llamar a OpenAI para {file.name}: {e}")
+                            continue
+
+                        results.append(row)
+                        if record is not None:
+                            detected_doc_types.add(record["doc_type"])
+                            stored_records.append(record)
+                            training_samples.append(
+                                {
+                                    "country": country,
+                                    "person_type": person_type,
+                                    "doc_type": record["doc_type"],
+                                    "texto_inicio": first_page_text(raw_text),
+                                }
                             )
 
-                    # Comparar identificación
-                    if expected_id:
-                        if not identificacion:
-                            estado = "WARNING"
-                            detalle_msgs.append(
-                                "No se detectó identificación fiscal, revisar manualmente."
+                    progress_bar.empty()
+
+                    if RESULTS_STORE_PATH and stored_records:
+                        try:
+                            append_results(RESULTS_STORE_PATH, stored_records)
+                        except OSError as e:
+                            st.warning(f"No se pudieron guardar los resultados: {e}")
+
+                    if CLASSIFIER_TRAINING_PATH and training_samples:
+                        try:
+                            append_results(CLASSIFIER_TRAINING_PATH, training_samples)
+                        except OSError as e:
+                            st.warning(f"No se pudieron guardar las muestras del clasificador: {e}")
+
+                    if not results:
+                        st.warning("No se obtuvieron resultados. Revisa los errores anteriores.")
+                        st.markdown("</div></div>", unsafe_allow_html=True)
+                        return
+
+                    df = pd.DataFrame(results)
+
+                    # --------- Resumen global ---------- #
+                    missing_docs = [
+                        doc
+                        for doc in rules_cfg["required_docs"]
+                        if doc not in detected_doc_types
+                    ]
+                    has_error = any(r["Estado"] == "ERROR" for r in results)
+                    has_warning = any(r["Estado"] == "WARNING" for r in results)
+
+                    if not missing_docs and not has_error and not has_warning:
+                        st.markdown(
+                            """
+                            <div class="status-ok">
+                            ✅ Toda la documentación requerida parece correcta para este país
+                            y tipo de persona. No se detectaron anomalías automáticas.
+                            </div>
+                            """,
+                            unsafe_allow_html=True,
+                        )
+                    else:
+                        if missing_docs:
+                            st.markdown(
+                                f"""
+                                <div class="status-error">
+                                ❌ Falta(n) documento(s) requerido(s) para {person_type} en {country}: 
+                                <b>{", ".join(missing_docs)}</b>.
+                                </div>
+                                """,
+                                unsafe_allow_html=True,
                             )
-                        elif expected_id not in identificacion:
-                            estado = "WARNING"
-                            detalle_msgs.append(
-                                f"El {id_label} no coincide con el esperado."
+                        if has_error:
+                            st.markdown(
+                                """
+                                <div class="status-error">
+                                ❌ Se detectaron documentos vencidos o con problemas críticos
+                                (revisión manual recomendada).
+                                </div>
+                                """,
+                                unsafe_allow_html=True,
                             )
-
-                    # Vigencia
-                    max_age_days = rules_cfg["max_age_days"].get(doc_type)
-                    fecha_emision = parse_date_safe(fecha_emision_str)
-                    if max_age_days and fecha_emision:
-                        delta = datetime.now() - fecha_emision
-                        if delta > timedelta(days=max_age_days):
-                            estado = "ERROR"
-                            detalle_msgs.append(
-                                f"Documento con vigencia mayor a {max_age_days} días."
+                        elif has_warning:
+                            st.markdown(
+                                """
+                                <div class="status-warning">
+                                ⚠️ Hay inconsistencias menores (nombres, IDs o fechas dudosas).
+                                Revisa el detalle por documento.
+                                </div>
+                                """,
+                                unsafe_allow_html=True,
                             )
-                    elif max_age_days and not fecha_emision:
-                        estado = "WARNING"
-                        detalle_msgs.append(
-                            "No se pudo interpretar la fecha de emisión para validar vigencia."
-                        )
-
-                    results.append(
-                        {
-                            "Archivo": file.name,
-                            "Tipo documento": doc_type,
-                            "Razón / nombre detectado": razon or "—",
-                            f"{id_label} detectado": identificacion or "—",
-                            "Fecha emisión": fecha_emision_str or "—",
-                            "Fecha vencimiento": fecha_vencimiento_str or "—",
-                            "Estado": estado,
-                            "Detalle": " | ".join(detalle_msgs) if detalle_msgs else "OK",
-                        }
-                    )
-
-                progress_bar.empty()
-
-                if not results:
-                    st.warning("No se obtuvieron resultados. Revisa los errores anteriores.")
-                    st.markdown("</div></div>", unsafe_allow_html=True)
-                    return
 
-                df = pd.DataFrame(results)
+                    st.write("")
+                    st.dataframe(df, use_container_width=True)
 
-                # --------- Resumen global ---------- #
-                missing_docs = [
-                    doc
-                    for doc in rules_cfg["required_docs"]
-                    if doc not in detected_doc_types
-                ]
-                has_error = any(r["Estado"] == "ERROR" for r in results)
-                has_warning = any(r["Estado"] == "WARNING" for r in results)
-
-                if not missing_docs and not has_error and not has_warning:
                     st.markdown(
                         """
-                        <div class="status-ok">
-                        ✅ Toda la documentación requerida parece correcta para este país
-                        y tipo de persona. No se detectaron anomalías automáticas.
+                        <div class="disclaimer">
+                          📝 <b>Nota:</b> Esta herramienta es de apoyo operativo y no reemplaza
+                          la validación formal del equipo legal/compliance. Úsala como
+                          pre-filtro para tus flujos de Service Desk o KAM.
                         </div>
                         """,
                         unsafe_allow_html=True,
                     )
-                else:
-                    if missing_docs:
-                        st.markdown(
-                            f"""
-                            <div class="status-error">
-                            ❌ Falta(n) documento(s) requerido(s) para {person_type} en {country}: 
-                            <b>{", ".join(missing_docs)}</b>.
-                            </div>
-                            """,
-                            unsafe_allow_html=True,
-                        )
-                    if has_error:
+                    if CLASSIFIER_TRAINING_PATH:
                         st.markdown(
                             """
-                            <div class="status-error">
-                            ❌ Se detectaron documentos vencidos o con problemas críticos
-                            (revisión manual recomendada).
+                            <div class="disclaimer">
+                              🗂️ El inicio del texto de cada documento se guarda en el
+                              servidor para entrenar el clasificador local de documentos.
                             </div>
                             """,
                             unsafe_allow_html=True,
                         )
-                    elif has_warning:
-                        st.markdown(
-                            """
-                            <div class="status-warning">
-                            ⚠️ Hay inconsistencias menores (nombres, IDs o fechas dudosas).
-                            Revisa el detalle por documento.
-                            </div>
-                            """,
-                            unsafe_allow_html=True,
-                        )
-
-                st.write("")
-                st.dataframe(df, use_container_width=True)
-
-                st.markdown(
-                    """
-                    <div class="disclaimer">
-                      📝 <b>Nota:</b> Esta herramienta es de apoyo operativo y no reemplaza
-                      la validación formal del equipo legal/compliance. Úsala como
-                      pre-filtro para tus flujos de Service Desk o KAM.
-                    </div>
-                    """,
-                    unsafe_allow_html=True,
-                )
 
         st.markdown("</div>", unsafe_allow_html=True)  # card resultados
         st.markdown("</div>", unsafe_allow_html=True)  # main-container
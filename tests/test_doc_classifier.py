@@ -0,0 +1,102 @@
+from doc_classifier import (
+    IRRELEVANT,
+    KeywordClassifier,
+    NaiveBayesClassifier,
+    training_samples,
+)
+
+CO_NATURAL = ["RUT", "Documento de identidad", "Certificado Bancario"]
+
+RULES = {
+    "Colombia": {
+        "person_types": {
+            "Persona natural": {"required_docs": CO_NATURAL},
+            "Persona jurídica": {
+                "required_docs": ["RUT", "Camara de Comercio", "Certificado Bancario"]
+            },
+        }
+    }
+}
+
+BANK_CERTIFICATE = (
+    "Bancolombia S.A. certifica que ACME S.A.S. identificada con NIT 900.123.456 "
+    "posee en esta entidad una cuenta de ahorro número 123-456789-01 abierta desde "
+    "el 12 de marzo de 2019, la cual se encuentra activa a la fecha. "
+    "Se expide a solicitud del interesado en Medellín el 1 de octubre de 2026."
+)
+
+
+def test_keyword_match_predicts_candidate():
+    text = "CERTIFICACIÓN BANCARIA. Titular de la cuenta de ahorros: ACME. " * 3
+    assert KeywordClassifier().predict(text, CO_NATURAL) == ("Certificado Bancario", 1.0)
+
+
+def test_no_keyword_match_is_not_irrelevant():
+    assert KeywordClassifier().predict(BANK_CERTIFICATE, CO_NATURAL) == (None, 0.0)
+
+
+def test_generic_legal_phrases_are_not_irrelevant():
+    text = (
+        "ACME S.A.S., persona jurídica identificada con NIT 900.123.456, posee en "
+        "Bancolombia una cuenta de ahorro número 123-456789-01, abierta desde el 12 de "
+        "marzo de 2019. Representante legal: Juan Pérez. Inscrita en el registro "
+        "nacional de sociedades con capital social de 10.000.000 de pesos. "
+    ) * 2
+    candidates = RULES["Colombia"]["person_types"]["Persona jurídica"]["required_docs"]
+    assert KeywordClassifier().predict(text, candidates) == (None, 0.0)
+
+
+def test_non_candidate_document_is_irrelevant():
+    text = (
+        "Cámara de Comercio de Bogotá. Certificado de existencia y representación legal. "
+        "Matrícula mercantil 123456. " * 3
+    )
+    assert KeywordClassifier().predict(text, CO_NATURAL) == (IRRELEVANT, 1.0)
+
+
+def test_short_text_is_never_irrelevant():
+    assert KeywordClassifier().predict("Camara de comercio", CO_NATURAL) == (None, 0.0)
+
+
+def test_training_samples_normalise_names_and_drop_unknown_types():
+    records = [
+        {"country": "Colombia", "person_type": "Persona natural",
+         "doc_type": "Certificado bancario", "texto_inicio": "a"},
+        {"country": "Colombia", "person_type": "Persona natural",
+         "doc_type": "Cámara de Comercio", "texto_inicio": "b"},
+        {"country": "Colombia", "person_type": "Persona jurídica",
+         "doc_type": "CÁMARA DE COMERCIO", "texto_inicio": "c"},
+        {"country": "Colombia", "person_type": "Persona natural",
+         "doc_type": "Certificación bancaria", "texto_inicio": "d"},
+        {"country": "Colombia", "person_type": "Persona natural",
+         "doc_type": "Desconocido", "texto_inicio": "e"},
+        {"country": "Colombia", "person_type": "Persona natural",
+         "doc_type": "RUT", "texto_inicio": None},
+    ]
+    assert list(training_samples(records, RULES)) == [
+        ("a", "Certificado Bancario"),
+        ("b", IRRELEVANT),
+        ("c", "Camara de Comercio"),
+    ]
+
+
+def test_naive_bayes_skips_only_confident_irrelevant():
+    model = NaiveBayesClassifier.fit(
+        [
+            ("registro unico tributario dian formulario " * 30, "RUT"),
+            ("certifica titular cuenta ahorros banco " * 30, "Certificado Bancario"),
+            ("factura venta total producto iva " * 30, IRRELEVANT),
+        ]
+    )
+    label, _ = model.predict("factura de venta total iva producto " * 20, CO_NATURAL)
+    assert label == IRRELEVANT
+    label, _ = model.predict("dian registro tributario formulario " * 20, CO_NATURAL)
+    assert label == "RUT"
+    assert model.predict("factura", CO_NATURAL) == (None, 0.0)
+
+
+def test_naive_bayes_round_trip(tmp_path):
+    model = NaiveBayesClassifier.fit([("dian rut " * 100, "RUT")])
+    path = tmp_path / "model.json"
+    model.save(path)
+    assert NaiveBayesClassifier.load(path).class_counts == {"RUT": 1}
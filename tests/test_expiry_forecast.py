@@ -0,0 +1,129 @@
+from datetime import date
+
+import pytest
+
+from expiry_forecast import (
+    ExpiryIndex,
+    append_results,
+    build_report,
+    compute_expiry_date,
+    load_index,
+    main,
+)
+
+
+def test_expiry_is_first_day_app_flags_as_error():
+    # La app marca ERROR cuando now - emision > max_age_days.
+    assert compute_expiry_date("2026-01-01", None, 30) == date(2026, 1, 31)
+
+
+def test_fecha_vencimiento_is_valid_through_that_day():
+    assert compute_expiry_date(None, "2026-03-10", None) == date(2026, 3, 11)
+    assert compute_expiry_date("2026-01-01", "2026-01-10", 30) == date(2026, 1, 11)
+
+
+def test_missing_dates_are_skipped():
+    index = ExpiryIndex.from_records([{"country": "Mexico", "max_age_days": 60}])
+    assert len(index) == 0
+    assert index.skipped == 1
+
+
+def test_expiry_today_counts_as_expired_not_upcoming():
+    index = ExpiryIndex.from_records(
+        [{"country": "Colombia", "fecha_emision": "2026-01-01", "max_age_days": 30}]
+    )
+    today = date(2026, 1, 31)
+    assert index.expired(today=today)["Colombia"]
+    assert index.expiring_within(30, today=today) == {}
+
+    rows = build_report(index, 30, today=today, include_expired=True)
+    assert rows[0]["Días restantes"] == 0
+    assert rows[0]["Válido hasta"] == "2026-01-30"
+
+
+def test_expiring_within_groups_by_country_and_sorts():
+    index = ExpiryIndex()
+    index.add({"country": "Colombia", "fecha_emision": "2026-01-20", "max_age_days": 30})
+    index.add({"country": "Colombia", "fecha_emision": "2026-01-05", "max_age_days": 30})
+    index.add({"country": "Mexico", "fecha_vencimiento": "2026-02-01"})
+    index.add({"country": "Mexico", "fecha_vencimiento": "2026-06-01"})
+
+    result = index.expiring_within(40, today=date(2026, 1, 10))
+    assert [r["fecha_expiracion"] for r in result["Colombia"]] == [
+        date(2026, 2, 4),
+        date(2026, 2, 19),
+    ]
+    assert len(result["Mexico"]) == 1
+    assert index.expiring_within(30, country="Mexico", today=date(2026, 1, 10)).keys() == {
+        "Mexico"
+    }
+
+
+def test_index_keeps_only_report_fields():
+    index = ExpiryIndex.from_records(
+        [
+            {
+                "country": "Colombia",
+                "fecha_emision": "2026-01-01",
+                "max_age_days": 30,
+                "texto_inicio": "x" * 3000,
+            }
+        ]
+    )
+    (record,) = index.expired(today=date(2026, 12, 31))["Colombia"]
+    assert "texto_inicio" not in record
+
+
+def test_invalid_today_is_rejected(tmp_path):
+    results = tmp_path / "results.jsonl"
+    results.write_text("")
+    with pytest.raises(SystemExit):
+        main([str(results), "--today", "19/10/2026"])
+
+
+def _validation(validated_at, fecha_emision, **extra):
+    record = {
+        "validated_at": validated_at,
+        "country": "Colombia",
+        "person_type": "Persona jurídica",
+        "identificacion": "900123456",
+        "doc_type": "Certificado Bancario",
+        "fecha_emision": fecha_emision,
+        "max_age_days": 90,
+    }
+    record.update(extra)
+    return record
+
+
+def test_only_latest_validation_per_document_is_indexed():
+    old = _validation("2026-01-05T10:00:00", "2026-01-01")
+    renewed = _validation("2026-04-01T10:00:00", "2026-03-30")
+    other = _validation("2026-01-05T10:00:00", "2026-01-01", identificacion="800999999")
+
+    incremental = ExpiryIndex()
+    for record in (old, renewed, old, other):
+        incremental.add(record)
+
+    for index in (ExpiryIndex.from_records([renewed, old, other]), incremental):
+        assert len(index) == 2
+        expired = index.expired(today=date(2026, 4, 15))["Colombia"]
+        assert [r["identificacion"] for r in expired] == ["800999999"]
+        upcoming = index.expiring_within(90, today=date(2026, 4, 15))["Colombia"]
+        assert [r["fecha_emision"] for r in upcoming] == ["2026-03-30"]
+
+def test_persisted_index_reads_only_new_records(tmp_path):
+    results = tmp_path / "results.jsonl"
+    index_path = tmp_path / "results.idx"
+    append_results(results, [_validation("2026-01-05T10:00:00", "2026-01-01")])
+    assert len(load_index(results, index_path)) == 1
+
+    append_results(results, [_validation("2026-04-01T10:00:00", "2026-03-30")])
+    with open(results, "a", encoding="utf-8") as fh:
+        fh.write('{"incompleta": ')
+    index = load_index(results, index_path)
+    assert len(index) == 1
+    assert index.expired(today=date(2026, 4, 15)) == {}
+
+    # Si el archivo de resultados se reemplaza, el índice se reconstruye.
+    results.write_text("")
+    assert len(load_index(results, index_path)) == 0
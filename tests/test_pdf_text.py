@@ -0,0 +1,66 @@
+from pdf_text import _drop_repeated_lines, _merge_by_position, format_table
+
+
+def test_two_column_table_is_key_value():
+    rows = [["Titular", "ACME SAS"], ["Fecha expedición", "2026-08-01"], [None, None]]
+    assert format_table(rows) == "Titular: ACME SAS\nFecha expedición: 2026-08-01"
+
+
+def test_transaction_rows_are_collapsed():
+    rows = [
+        ["Fecha", "Descripción", "Monto", "Saldo"],
+        ["01/08/2026", "Pago", "1.200,00", "5.000,00"],
+        ["03/08/2026", "Compra", "300,00", "4.700,00"],
+        ["09/08/2026", "Abono", "50,00", "4.750,00"],
+        ["", "Saldo final", "", "4.750,00"],
+    ]
+    assert format_table(rows) == (
+        "Fecha\tDescripción\tMonto\tSaldo\n"
+        "Saldo final: 4.750,00\n"
+        "[3 movimientos omitidos: 01/08/2026 – 09/08/2026]"
+    )
+
+
+def test_decimal_amounts_are_not_dates():
+    rows = [
+        ["Concepto", "Valor"],
+        ["Saldo disponible", "12.50"],
+        ["Intereses", "3.25"],
+        ["Comisión", "10.00"],
+    ]
+    assert format_table(rows) == (
+        "Concepto: Valor\nSaldo disponible: 12.50\nIntereses: 3.25\nComisión: 10.00"
+    )
+
+
+def test_lines_differing_in_numbers_are_kept():
+    pages = [["Saldo al 2024-01-31: 1.000,00"], ["Saldo al 2024-02-29: 9.999,00"]]
+    assert _drop_repeated_lines(pages) == pages
+
+
+def test_identical_headers_and_page_numbers_are_dropped():
+    pages = [
+        ["Banco X", "Fecha de corte: 2024-01-31", "a", "Página 1 de 2"],
+        ["Banco X", "Fecha de corte: 2024-02-29", "b", "Página 2 de 2"],
+    ]
+    assert _drop_repeated_lines(pages) == [
+        ["Banco X", "Fecha de corte: 2024-01-31", "a"],
+        ["Fecha de corte: 2024-02-29", "b"],
+    ]
+
+
+def test_repeated_lines_in_page_body_are_kept():
+    body = ["h1", "h2", "h3", "Total", "f1", "f2", "f3"]
+    other = ["x1", "x2", "x3", "Total", "y1", "y2", "y3"]
+    assert _drop_repeated_lines([body, other])[1][3] == "Total"
+
+
+def test_tables_keep_their_position_in_the_page():
+    lines = [(50, "Certificado de cuenta"), (400, "Firma autorizada"), (700, "Pie de página")]
+    tables = [(120, "Titular: ACME SAS\nFecha de expedición: 2026-08-01"), (500, "")]
+    assert _merge_by_position(lines, tables) == [
+        "Certificado de cuenta",
+        "Titular: ACME SAS\nFecha de expedición: 2026-08-01",
+        "Firma autorizada",
+        "Pie de página",
+    ]